@@ -30,16 +30,304 @@ bl_info = {
 import bpy
 import numpy as np # Useful for array operations, often comes with Blender or librosa
 import os
+import functools
+import importlib.util
+from collections import OrderedDict
+
+# --- Lazy Imports ---
+# librosa (and numba, which it pulls in) can take seconds to import, so neither is
+# imported until the first generation. Enabling the addon stays instant.
+_librosa = None
+_librosa_found = None
+_numba_kernels = None # Kernels module once imported, False if numba is missing
+
+def _librosa_available():
+    """Checks whether librosa is installed without importing it (cheap enough for poll/draw)."""
+    global _librosa_found
+    if _librosa_found is None:
+        _librosa_found = importlib.util.find_spec("librosa") is not None
+        if not _librosa_found:
+            print("Sound Waveform Generator: librosa library not found.")
+            print("Please install it using Blender's Python.")
+    return _librosa_found
+
+def _get_librosa():
+    """Imports librosa on first use and returns the module."""
+    global _librosa
+    if _librosa is None:
+        import librosa
+        _librosa = librosa
+    return _librosa
+
+def _get_numba_kernels():
+    """Returns the compiled RADIAL/SPIRAL kernels, or None if numba is missing or unusable."""
+    global _numba_kernels
+    if _numba_kernels is None:
+        try:
+            from . import _kernels # Numba is optional: fuses the vertex math into one compiled loop
+            _numba_kernels = _kernels
+        except ImportError:
+            _numba_kernels = False
+        except Exception as e: # e.g. RuntimeError with no writable cache location
+            _disable_numba_kernels(e)
+    return _numba_kernels or None
+
+def _disable_numba_kernels(error):
+    """Switches to the NumPy path for this and later runs after a kernel fails to compile or run."""
+    global _numba_kernels
+    print(f"Numba kernels failed, using NumPy instead: {error}")
+    _numba_kernels = False
+
+# --- Audio Helpers ---
+# Decoded audio keyed by (filepath, mtime), so tweaking settings doesn't re-decode the file
+_AUDIO_CACHE = OrderedDict()
+_AUDIO_CACHE_SIZE = 2
+
+def load_audio(filepath):
+    """Loads an audio file as float32 (channels first), reusing recently decoded files."""
+    key = (filepath, os.path.getmtime(filepath))
+    if key in _AUDIO_CACHE:
+        _AUDIO_CACHE.move_to_end(key)
+        print("Using cached audio")
+        return _AUDIO_CACHE[key]
+
+    # sr=None loads at original sample rate, then we resample/downsample later
+    # mono=False preserves channels
+    audio_data, sample_rate = _get_librosa().load(filepath, sr=None, mono=False)
+    # Keep everything downstream in contiguous float32 (half the memory traffic of float64)
+    audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
+    audio_data.setflags(write=False) # Shared between runs, must never be modified in place
+
+    _AUDIO_CACHE[key] = (audio_data, sample_rate)
+    while len(_AUDIO_CACHE) > _AUDIO_CACHE_SIZE:
+        _AUDIO_CACHE.popitem(last=False) # Evict least recently used
+    return audio_data, sample_rate
+
+# Files with more samples than this (all channels) are streamed instead of loaded whole
+_STREAM_MIN_SAMPLES = 50_000_000 # ~200 MB as float32
+_STREAM_CHUNK_SAMPLES = 1 << 20 # Samples per channel decoded at a time while streaming
+
+def _block_starts(num_samples, num_blocks):
+    """Start index of each of num_blocks near-equal blocks that together cover all num_samples."""
+    return (np.arange(num_blocks, dtype=np.int64) * num_samples) // num_blocks
+
+def _block_extremes(samples, starts):
+    """Per-block (max, min) along the last axis, for blocks beginning at `starts`."""
+    return (np.maximum.reduceat(samples, starts, axis=-1),
+            np.minimum.reduceat(samples, starts, axis=-1))
+
+def _signed_peak(hi, lo):
+    """Picks whichever of max/min has the larger magnitude, keeping its sign."""
+    return np.where(hi >= -lo, hi, lo)
+
+def downsample_peaks(audio_data, target_resolution):
+    """Reduces the last axis to target_resolution points.
+
+    The signal is split into near-equal contiguous blocks covering every
+    sample, and each block keeps the sample with the largest magnitude
+    (sign preserved), so short transients always show up in the mesh.
+    """
+    starts = _block_starts(audio_data.shape[-1], target_resolution)
+    return _signed_peak(*_block_extremes(audio_data, starts))
+
+def stream_peaks(filepath, target_resolution, mono):
+    """Decodes a long file chunk by chunk, reducing it straight to per-block peaks.
+
+    Same result as downsample_peaks(), but memory use scales with the
+    resolution instead of the file length. Returns None for files short
+    enough to go through load_audio() (and its cache), or for formats
+    soundfile can't open. Decode errors are raised to the caller.
+    """
+    peaks = _stream_peaks(filepath, os.path.getmtime(filepath), target_resolution, mono)
+    return None if peaks is None else peaks.copy() # Callers normalize in place
+
+@functools.lru_cache(maxsize=4)
+def _stream_peaks(filepath, mtime, target_resolution, mono):
+    """Cached body of stream_peaks(), so tweaking scales doesn't re-decode long files."""
+    librosa = _get_librosa()
+    try:
+        import soundfile # Installed with librosa; also what librosa.stream reads with
+        info = soundfile.info(filepath)
+    except Exception:
+        return None # Not readable by soundfile (e.g. MP3 on older libsndfile), load_audio() decodes it
+    if info.frames * info.channels < _STREAM_MIN_SAMPLES:
+        return None
+
+    target_resolution = min(target_resolution, info.frames)
+    starts = _block_starts(info.frames, target_resolution) # Same blocks as downsample_peaks()
+    try:
+        stream = librosa.stream(
+            filepath,
+            block_length=1,
+            frame_length=_STREAM_CHUNK_SAMPLES,
+            hop_length=_STREAM_CHUNK_SAMPLES,
+            mono=mono,
+        )
+    except Exception as e:
+        print(f"Streaming not possible, loading whole file instead: {e}")
+        return None
+
+    hi = lo = None
+    pos = 0 # Index of the chunk's first sample in the file
+    for chunk in stream:
+        chunk = np.atleast_2d(chunk) # (channels, samples)
+        num_samples = min(chunk.shape[-1], info.frames - pos)
+        if num_samples <= 0:
+            break
+        if hi is None:
+            hi = np.full((chunk.shape[0], target_resolution), -np.inf, dtype=np.float32)
+            lo = np.full((chunk.shape[0], target_resolution), np.inf, dtype=np.float32)
+
+        # Blocks touched by this chunk; the first may have started in an earlier chunk
+        first = np.searchsorted(starts, pos, side='right') - 1
+        last = np.searchsorted(starts, pos + num_samples - 1, side='right') - 1
+        local_starts = np.maximum(starts[first:last + 1] - pos, 0)
+        chunk_hi, chunk_lo = _block_extremes(chunk[:, :num_samples], local_starts)
+        np.maximum(hi[:, first:last + 1], chunk_hi, out=hi[:, first:last + 1])
+        np.minimum(lo[:, first:last + 1], chunk_lo, out=lo[:, first:last + 1])
+        pos += num_samples
+
+    if hi is None:
+        return None
+    print(f"Streamed audio: {info.channels} channel(s), {info.frames} samples, Sample Rate: {info.samplerate}")
+    filled = np.searchsorted(starts, pos) # Blocks reached before the stream ended
+    peaks = _signed_peak(hi[:, :filled], lo[:, :filled])
+    peaks = peaks[0] if len(peaks) == 1 else peaks
+    peaks.setflags(write=False) # Returned from the cache, must not be modified
+    return peaks
+
+def downsample_resample(audio_data, target_resolution):
+    """Reduces the last axis to target_resolution points with a band-limited resampler.
+
+    The signal is low-pass filtered before decimation, giving a smooth,
+    alias-free curve. The whole clip is resampled by the exact ratio of
+    sample counts, so only off-by-one rounding is left for fix_length().
+    """
+    num_total_samples = audio_data.shape[-1]
+
+    librosa = _get_librosa()
+    # Rates are just the sample counts, so the whole clip maps onto target_resolution points
+    sampled = librosa.resample(audio_data, orig_sr=num_total_samples, target_sr=target_resolution, res_type='soxr_qq')
+    sampled = librosa.util.fix_length(sampled, size=target_resolution)
+    if np.shares_memory(sampled, audio_data): # No-op resample hands back the (read-only) input
+        sampled = sampled.copy()
+    return sampled
+
+def normalize_peak(samples):
+    """Scales samples in place so the largest magnitude becomes 1.0.
+
+    Silent input (peak of 0) is returned unchanged.
+    """
+    peak = float(np.abs(samples).max())
+    if peak > 0:
+        samples *= np.float32(1.0 / peak)
+    return samples
+
+# --- Mesh Helpers ---
+@functools.lru_cache(maxsize=4)
+def ribbon_topology(num_verts, style):
+    """Returns (edges, loop_starts, loop_totals, loop_verts, loop_edges) for a waveform style.
+
+    LINEAR and RADIAL are strips of quads over (bottom, top) vertex pairs,
+    SPIRAL is a single polyline without faces. Every edge is listed and each
+    loop knows its edge, so Blender doesn't have to derive them. Cached, since
+    tweaking scales regenerates the same topology.
+    """
+    edges = np.empty((0, 2), dtype=np.int32)
+    faces = np.empty((0, 4), dtype=np.int32)
+    face_edges = np.empty((0, 4), dtype=np.int32)
+
+    if style in {'LINEAR', 'RADIAL'}:
+        pair_idx = np.arange(num_verts, dtype=np.int32)
+        if style == 'LINEAR' or num_verts < 3: # Too few pairs to close a ring without degenerate edges
+            idx = pair_idx[:-1]
+            next_idx = idx + 1
+        else:
+            idx = pair_idx
+            next_idx = (idx + 1) % num_verts # Wrap around for the last segment
+        num_faces = len(idx)
+        v_idx, next_v_idx = idx * 2, next_idx * 2
+
+        # Edges: bottom segments, then top segments, then top/bottom rungs (for thickness)
+        edges = np.concatenate([
+            np.stack([v_idx, next_v_idx], axis=1),
+            np.stack([v_idx + 1, next_v_idx + 1], axis=1),
+            np.stack([pair_idx * 2, pair_idx * 2 + 1], axis=1),
+        ])
+
+        # Faces (quads connecting current pair to next pair) and the edge under each corner
+        faces = np.stack([v_idx, next_v_idx, next_v_idx + 1, v_idx + 1], axis=1)
+        face_edges = np.stack([
+            idx,                      # Bottom segment
+            2 * num_faces + next_idx, # Rung of next pair
+            num_faces + idx,          # Top segment
+            2 * num_faces + idx,      # Rung of current pair
+        ], axis=1).astype(np.int32, copy=False)
+
+    elif style == 'SPIRAL':
+        e_idx = np.arange(num_verts - 1, dtype=np.int32)
+        edges = np.stack([e_idx, e_idx + 1], axis=1)
+        # No faces for a simple spiral line, could add thickness later
+
+    num_faces = len(faces)
+    topo = (
+        np.ascontiguousarray(edges.ravel()),
+        np.arange(0, num_faces * 4, 4, dtype=np.int32), # loop_start
+        np.full(num_faces, 4, dtype=np.int32),          # loop_total
+        np.ascontiguousarray(faces.ravel()),            # Quad corners in loop order
+        np.ascontiguousarray(face_edges.ravel()),       # Edge leaving each corner
+    )
+    for arr in topo:
+        arr.setflags(write=False) # Returned from the cache, must not be modified
+    return topo
+
+def fill_mesh(mesh, verts, edges, loop_starts, loop_totals, loop_verts, loop_edges):
+    """Fills an empty mesh from flat vertex/edge/polygon buffers using foreach_set.
+
+    Each buffer is handed to Blender in one call, which keeps dense meshes fast.
+    The topology must be complete (see ribbon_topology()), edges aren't recalculated.
+    """
+    verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+
+    if len(edges):
+        mesh.edges.add(len(edges) // 2)
+        mesh.edges.foreach_set("vertices", edges)
+
+    if len(loop_starts):
+        mesh.loops.add(len(loop_verts))
+        mesh.loops.foreach_set("vertex_index", loop_verts)
+        mesh.loops.foreach_set("edge_index", loop_edges)
+        mesh.polygons.add(len(loop_starts))
+        mesh.polygons.foreach_set("loop_start", loop_starts)
+        mesh.polygons.foreach_set("loop_total", loop_totals)
+
+    # Topology is already complete, skip edge recalculation. Edges without faces
+    # (SPIRAL) still need the loose flag or older Blender versions won't draw them.
+    mesh.update(calc_edges=False, calc_edges_loose=not len(loop_starts))
+
+@functools.lru_cache(maxsize=4)
+def trig_table(num_verts, style, revolutions=1.0):
+    """Returns cached float32 (cos, sin) arrays of the per-sample angles for RADIAL/SPIRAL.
+
+    RADIAL spans one full turn without repeating the start angle, SPIRAL
+    spans `revolutions` turns from the first to the last sample.
+    """
+    if style == 'SPIRAL':
+        if num_verts > 1:
+            norm_time = np.linspace(0.0, 1.0, num_verts, dtype=np.float32)
+        else:
+            norm_time = np.full(num_verts, 0.5, dtype=np.float32)
+        angles = norm_time * np.float32(2 * np.pi * revolutions)
+    else: # Angle based on time (0 to 2*pi)
+        angles = np.arange(num_verts, dtype=np.float32) * np.float32(2 * np.pi / num_verts)
 
-# Attempt to import librosa, provide guidance if it fails
-try:
-    import librosa
-    LIBROSA_AVAILABLE = True
-except ImportError:
-    LIBROSA_AVAILABLE = False
-    print("Sound Waveform Generator: librosa library not found.")
-    print("Please install it using Blender's Python.")
-    # Add more detailed instructions here or in documentation later
+    table = (np.cos(angles), np.sin(angles))
+    for arr in table:
+        arr.setflags(write=False) # Returned from the cache, must not be modified
+    return table
 
 # --- Properties ---
 class SoundWaveformProperties(bpy.types.PropertyGroup):
@@ -105,6 +393,16 @@ class SoundWaveformProperties(bpy.types.PropertyGroup):
         default='MONO',
     )
 
+    downsample_method: bpy.props.EnumProperty(
+        name="Downsampling",
+        description="How audio samples are reduced to the target resolution",
+        items=[
+            ('PEAK', "Peak", "Keep the loudest sample of each block (preserves transients)"),
+            ('RESAMPLE', "Resample", "Band-limited resampling (smooth, alias-free)"),
+        ],
+        default='PEAK',
+    )
+
     normalize_amp: bpy.props.BoolProperty(
         name="Normalize Amplitude",
         description="Scale amplitude values to fit between -1.0 and 1.0 before applying Scale Y/Z",
@@ -129,10 +427,10 @@ class SOUNDWAVEFORM_OT_generate(bpy.types.Operator):
     def poll(cls, context):
         # Only allow running if librosa is available and a file is selected
         props = context.scene.soundwaveform_props
-        return LIBROSA_AVAILABLE and props.filepath != "" and os.path.exists(props.filepath)
+        return _librosa_available() and props.filepath != "" and os.path.exists(props.filepath)
 
     def execute(self, context):
-        if not LIBROSA_AVAILABLE:
+        if not _librosa_available():
             self.report({'ERROR'}, "Librosa library not found. Please install it in Blender's Python environment.")
             return {'CANCELLED'}
 
@@ -146,162 +444,170 @@ class SOUNDWAVEFORM_OT_generate(bpy.types.Operator):
         print(f"Loading audio from: {filepath}")
 
         try:
-            # Load audio file using librosa
-            # sr=None loads at original sample rate, then we resample/downsample later
-            # mono=False preserves channels
-            audio_data, sample_rate = librosa.load(filepath, sr=None, mono=False)
-            print(f"Loaded audio: {audio_data.shape}, Sample Rate: {sample_rate}")
-
-            # Handle stereo/mono
-            if audio_data.ndim > 1: # Stereo
-                if props.stereo_handling == 'MONO':
-                    audio_data = librosa.to_mono(audio_data)
-                    print("Converted to Mono (Averaged)")
-                elif props.stereo_handling == 'Z_AXIS' and props.vis_style == 'LINEAR':
-                    # Keep both channels for Linear Z-axis mode
-                    pass
-                else: # Default to using only the first channel if stereo mode not applicable
-                    audio_data = audio_data[0]
+            keep_stereo = props.stereo_handling == 'Z_AXIS' and props.vis_style == 'LINEAR'
+            sampled = None
+
+            # Very long files are reduced to peaks while decoding instead of being loaded whole
+            if props.downsample_method == 'PEAK':
+                sampled = stream_peaks(filepath, props.resolution, mono=props.stereo_handling == 'MONO')
+                if sampled is not None and sampled.ndim > 1 and not keep_stereo:
+                    sampled = sampled[0]
                     print("Using only first channel")
-            else: # Already mono
-                 print("Audio is Mono")
+
+            if sampled is None:
+                # Load audio file using librosa (cached across generations)
+                audio_data, sample_rate = load_audio(filepath)
+                print(f"Loaded audio: {audio_data.shape}, Sample Rate: {sample_rate}")
+
+                # Handle stereo/mono
+                if audio_data.ndim > 1: # Stereo
+                    if props.stereo_handling == 'MONO':
+                        audio_data = audio_data.mean(axis=0, dtype=np.float32)
+                        print("Converted to Mono (Averaged)")
+                    elif keep_stereo:
+                        # Keep both channels for Linear Z-axis mode
+                        pass
+                    else: # Default to using only the first channel if stereo mode not applicable
+                        audio_data = audio_data[0]
+                        print("Using only first channel")
+                else: # Already mono
+                     print("Audio is Mono")
 
 
-            # --- Data Processing ---
-            num_total_samples = audio_data.shape[-1] # Get length from last dimension
-            target_resolution = props.resolution
+                # --- Data Processing ---
+                num_total_samples = audio_data.shape[-1] # Get length from last dimension
+                target_resolution = props.resolution
 
-            # Ensure resolution is not higher than available samples
-            if target_resolution > num_total_samples:
-                target_resolution = num_total_samples
-                print(f"Warning: Resolution capped at available samples: {num_total_samples}")
+                # Ensure resolution is not higher than available samples
+                if target_resolution > num_total_samples:
+                    target_resolution = num_total_samples
+                    print(f"Warning: Resolution capped at available samples: {num_total_samples}")
 
-            # Calculate step size for downsampling
-            step = num_total_samples // target_resolution
-            if step == 0: step = 1 # Avoid division by zero if resolution > samples
+                # Downsample to the target resolution
+                if props.downsample_method == 'RESAMPLE':
+                    sampled = downsample_resample(audio_data, target_resolution)
+                else: # Reduce each block of samples to its peak
+                    sampled = downsample_peaks(audio_data, target_resolution)
 
-            # Downsample (take average over windows or just pick samples)
-            # Simple approach: pick every 'step' sample
-            indices = np.arange(0, num_total_samples, step)
+            target_resolution = sampled.shape[-1]
 
-            if audio_data.ndim > 1 and props.stereo_handling == 'Z_AXIS' and props.vis_style == 'LINEAR':
-                 sampled_data_l = audio_data[0, indices]
-                 sampled_data_r = audio_data[1, indices]
+            if sampled.ndim > 1 and keep_stereo:
+                 sampled_data_l = sampled[0]
+                 sampled_data_r = sampled[1]
                  # Optionally normalize each channel independently
                  if props.normalize_amp:
-                     sampled_data_l = librosa.util.normalize(sampled_data_l)
-                     sampled_data_r = librosa.util.normalize(sampled_data_r)
+                     sampled_data_l = normalize_peak(sampled_data_l)
+                     sampled_data_r = normalize_peak(sampled_data_r)
             else:
-                # Handle mono or cases where we only care about one effective channel
-                if audio_data.ndim > 1: # If stereo but handled as mono/first channel earlier
-                    sampled_data = audio_data[0, indices] if props.stereo_handling != 'MONO' else librosa.to_mono(audio_data)[indices]
-                else: # Already mono
-                    sampled_data = audio_data[indices]
+                # Mono, or stereo already reduced to one channel above
+                sampled_data = sampled
 
                 if props.normalize_amp:
-                    sampled_data = librosa.util.normalize(sampled_data)
+                    sampled_data = normalize_peak(sampled_data)
 
 
-            print(f"Downsampled to {len(indices)} points.")
+            print(f"Downsampled to {target_resolution} points.")
 
             # --- Mesh Generation ---
             verts = []
-            edges = []
-            faces = []
-            num_verts = len(indices)
+            num_verts = target_resolution
 
             # Get scales
             sx, sy, sz = props.scale_x, props.scale_y, props.scale_z
             thickness = props.mesh_thickness
+            kernels = _get_numba_kernels() if props.vis_style in {'RADIAL', 'SPIRAL'} else None
 
             if props.vis_style == 'LINEAR':
-                has_stereo_z = audio_data.ndim > 1 and props.stereo_handling == 'Z_AXIS'
-
-                for i in range(num_verts):
-                    t = (i / (num_verts - 1)) if num_verts > 1 else 0.5 # Normalized time (0 to 1)
-                    x = t * sx
-
-                    if has_stereo_z:
-                        amp_l = sampled_data_l[i] * sy
-                        amp_r = sampled_data_r[i] * sz # Use second channel for z-offset/thickness
-                        # Create two vertices per sample for thickness based on right channel
-                        verts.append((x, amp_l, -amp_r * 0.5)) # Left channel Y, Right channel Z (bottom)
-                        verts.append((x, amp_l,  amp_r * 0.5)) # Left channel Y, Right channel Z (top)
-                    else:
-                        amp = sampled_data[i] * sy
-                        # Create two vertices per sample for fixed thickness
-                        verts.append((x, amp, -thickness * 0.5 * sz)) # Bottom edge
-                        verts.append((x, amp,  thickness * 0.5 * sz)) # Top edge
-
-                # Create edges and faces for the ribbon
-                for i in range(num_verts - 1):
-                    v_idx = i * 2
-                    # Edges along the waveform shape
-                    edges.append((v_idx, v_idx + 2))         # Bottom edge segment
-                    edges.append((v_idx + 1, v_idx + 3))     # Top edge segment
-                    # Edges connecting top/bottom (for thickness) - optional visually
-                    # edges.append((v_idx, v_idx + 1))
-                    # edges.append((v_idx + 2, v_idx + 3))
-
-                    # Create faces (quads)
-                    faces.append((v_idx, v_idx + 2, v_idx + 3, v_idx + 1))
+                has_stereo_z = sampled.ndim > 1 and props.stereo_handling == 'Z_AXIS'
+
+                # Normalized time (0 to 1), one entry per sample
+                if num_verts > 1:
+                    t = np.linspace(0.0, 1.0, num_verts, dtype=np.float32)
+                else:
+                    t = np.full(num_verts, 0.5, dtype=np.float32)
+                x = t * sx
+
+                # Two vertices per sample (bottom, top), built in one pass
+                ribbon = np.empty((num_verts, 2, 3), dtype=np.float32)
+                ribbon[:, :, 0] = x[:, None]
+
+                # Amplitudes are written straight into the interleaved buffer (no temporaries)
+                if has_stereo_z:
+                    np.multiply(sampled_data_l, sy, out=ribbon[:, 0, 1]) # Left channel Y
+                    ribbon[:, 1, 1] = ribbon[:, 0, 1]
+                    # Use second channel for z-offset/thickness
+                    np.multiply(sampled_data_r, sz * 0.5, out=ribbon[:, 1, 2]) # Right channel Z (top)
+                    np.negative(ribbon[:, 1, 2], out=ribbon[:, 0, 2])          # Right channel Z (bottom)
+                else:
+                    np.multiply(sampled_data, sy, out=ribbon[:, 0, 1])
+                    ribbon[:, 1, 1] = ribbon[:, 0, 1]
+                    # Fixed thickness along Z
+                    ribbon[:, 0, 2] = -thickness * 0.5 * sz # Bottom edge
+                    ribbon[:, 1, 2] = thickness * 0.5 * sz  # Top edge
+
+                verts = ribbon.reshape(-1, 3) # (2N, 3) view, bottom/top interleaved to match the faces
 
             elif props.vis_style == 'RADIAL':
                 center_offset = 1.0 # Base radius
-                for i in range(num_verts):
-                    angle = (i / num_verts) * 2 * np.pi # Angle based on time (0 to 2*pi)
-                    amp = sampled_data[i] * sy
-                    radius = center_offset + amp # Modulate radius by amplitude
+                z_offset = thickness * 0.5 * sz # Thickness along Z
+                ribbon = np.empty((num_verts, 2, 3), dtype=np.float32)
+                cos_a, sin_a = trig_table(num_verts, 'RADIAL')
+
+                if kernels is not None:
+                    try: # First call compiles the kernel
+                        kernels.build_radial(sampled_data, cos_a, sin_a, center_offset, sx, sy, z_offset, ribbon)
+                    except Exception as e:
+                        _disable_numba_kernels(e)
+                        kernels = None
+                if kernels is None:
+                    radius = (center_offset + sampled_data * sy).astype(np.float32, copy=False) # Modulate radius by amplitude
 
                     # Calculate base position on circle
-                    base_x = np.cos(angle) * radius * sx # Apply X scale to radius calculation
-                    base_y = np.sin(angle) * radius * sx # Apply X scale to radius calculation
-
-                    # Add thickness along Z
-                    z_offset = thickness * 0.5 * sz
-                    verts.append((base_x, base_y, -z_offset))
-                    verts.append((base_x, base_y,  z_offset))
-
-                 # Create edges and faces for the radial ribbon (similar logic to linear, connecting pairs)
-                for i in range(num_verts):
-                    v_idx = i * 2
-                    next_v_idx = ((i + 1) % num_verts) * 2 # Wrap around for the last segment
-
-                    # Faces (quads connecting current pair to next pair)
-                    faces.append((v_idx, next_v_idx, next_v_idx + 1, v_idx + 1))
+                    base_x = cos_a * radius * sx # Apply X scale to radius calculation
+                    base_y = sin_a * radius * sx # Apply X scale to radius calculation
 
+                    # Two vertices per sample
+                    ribbon[:, :, 0] = base_x[:, None]
+                    ribbon[:, :, 1] = base_y[:, None]
+                    ribbon[:, 0, 2] = -z_offset
+                    ribbon[:, 1, 2] = z_offset
+                verts = ribbon.reshape(-1, 3)
 
             elif props.vis_style == 'SPIRAL':
                 revolutions = 5.0 # Number of turns in the spiral
                 max_radius = 1.0 * sx # Spiral max radius controlled by X scale
-
-                for i in range(num_verts):
-                    norm_time = (i / (num_verts - 1)) if num_verts > 1 else 0.5 # Normalized time (0 to 1)
-                    angle = norm_time * 2 * np.pi * revolutions
+                cos_a, sin_a = trig_table(num_verts, 'SPIRAL', revolutions)
+
+                if kernels is not None:
+                    verts = np.empty((num_verts, 3), dtype=np.float32)
+                    try: # First call compiles the kernel
+                        kernels.build_spiral(sampled_data, cos_a, sin_a, max_radius, sy * sz, verts)
+                    except Exception as e:
+                        _disable_numba_kernels(e)
+                        kernels = None
+                if kernels is None:
+                    # Normalized time (0 to 1)
+                    if num_verts > 1:
+                        norm_time = np.linspace(0.0, 1.0, num_verts, dtype=np.float32)
+                    else:
+                        norm_time = np.full(num_verts, 0.5, dtype=np.float32)
                     radius = norm_time * max_radius
-                    amp = sampled_data[i] * sy # Amplitude controls Z
-
-                    x = np.cos(angle) * radius
-                    y = np.sin(angle) * radius
-                    z = amp * sz # Use Z scale for amplitude mapping
 
-                    verts.append((x, y, z))
-
-                # Create edges for the spiral line
-                for i in range(num_verts - 1):
-                    edges.append((i, i + 1))
-                # No faces for a simple spiral line, could add thickness later
+                    verts = np.stack([
+                        cos_a * radius,
+                        sin_a * radius,
+                        sampled_data * (sy * sz), # Amplitude controls Z, using Z scale for the mapping
+                    ], axis=1).astype(np.float32, copy=False)
 
             # --- Create Blender Object ---
-            mesh_name = os.path.splitext(os.path.basename(filepath))[0] + "_Waveform"
-            mesh = bpy.data.meshes.new(name=mesh_name)
-
-            if not verts:
+            if len(verts) == 0:
                  self.report({'WARNING'}, "No vertices generated. Check audio file and settings.")
                  return {'CANCELLED'}
 
-            mesh.from_pydata(verts, edges, faces)
-            mesh.update() # Calculate normals, etc.
+            mesh_name = os.path.splitext(os.path.basename(filepath))[0] + "_Waveform"
+            mesh = bpy.data.meshes.new(name=mesh_name)
+            # Edges/faces come from the (cached) topology for this style
+            fill_mesh(mesh, verts, *ribbon_topology(num_verts, props.vis_style))
 
             obj_name = mesh_name
             obj = bpy.data.objects.new(obj_name, mesh)
@@ -309,7 +615,8 @@ class SOUNDWAVEFORM_OT_generate(bpy.types.Operator):
             # Link object to the scene
             context.collection.objects.link(obj)
             # Select and make active
-            bpy.ops.object.select_all(action='DESELECT')
+            for selected_obj in context.selected_objects: # Deselect everything else
+                selected_obj.select_set(False)
             obj.select_set(True)
             context.view_layer.objects.active = obj
 
@@ -344,7 +651,7 @@ class SOUNDWAVEFORM_PT_panel(bpy.types.Panel):
         layout.label(text="Input Audio:")
         layout.prop(props, "filepath")
 
-        if not LIBROSA_AVAILABLE:
+        if not _librosa_available():
              box = layout.box()
              box.label(text="Librosa library not found!", icon='ERROR')
              box.label(text="Install it via Blender Preferences > Add-ons")
@@ -361,6 +668,7 @@ class SOUNDWAVEFORM_PT_panel(bpy.types.Panel):
             col = layout.column(align=True)
             col.prop(props, "resolution")
             col.prop(props, "vis_style")
+            col.prop(props, "downsample_method")
             col.prop(props, "normalize_amp")
 
             if props.vis_style == 'LINEAR':
@@ -385,7 +693,7 @@ class SOUNDWAVEFORM_PT_panel(bpy.types.Panel):
             layout.separator()
             # Use the operator's poll() method to grey out the button if conditions not met
             op_layout = layout.operator(SOUNDWAVEFORM_OT_generate.bl_idname, icon='MOD_WAVE')
-            # op_layout.enabled = LIBROSA_AVAILABLE and props.filepath != "" # Redundant if poll() is used
+            # op_layout.enabled = _librosa_available() and props.filepath != "" # Redundant if poll() is used
 
 # --- Registration ---
 classes = (
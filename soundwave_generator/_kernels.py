@@ -0,0 +1,47 @@
+# Sound Waveform Generator
+# Copyright (C) 2025 Benjamin Liu
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+# Optional Numba kernels for the RADIAL/SPIRAL vertex math.
+# Angles come in as precomputed cos/sin tables (see trig_table()).
+# Imported lazily by the addon; raises ImportError if numba is not installed.
+
+from numba import njit, prange
+
+@njit(parallel=True, fastmath=True, cache=True)
+def build_radial(samples, cos_a, sin_a, center_offset, scale_x, scale_y, z_offset, out):
+    """Writes the (N, 2, 3) radial ribbon into out in a single pass."""
+    n = samples.shape[0]
+    for i in prange(n):
+        radius = (center_offset + samples[i] * scale_y) * scale_x
+        x = cos_a[i] * radius
+        y = sin_a[i] * radius
+        out[i, 0, 0] = x
+        out[i, 0, 1] = y
+        out[i, 0, 2] = -z_offset
+        out[i, 1, 0] = x
+        out[i, 1, 1] = y
+        out[i, 1, 2] = z_offset
+
+@njit(parallel=True, fastmath=True, cache=True)
+def build_spiral(samples, cos_a, sin_a, max_radius, amp_scale, out):
+    """Writes the (N, 3) spiral polyline into out in a single pass."""
+    n = samples.shape[0]
+    for i in prange(n):
+        norm_time = i / (n - 1) if n > 1 else 0.5
+        radius = norm_time * max_radius
+        out[i, 0] = cos_a[i] * radius
+        out[i, 1] = sin_a[i] * radius
+        out[i, 2] = samples[i] * amp_scale